@@ -0,0 +1,419 @@
+# Shared Rentman ICS pipeline for transform_rentman_ical.py:
+# - Downloads the source feed once (cached for a few minutes when requests_cache is available)
+# - Parses VEVENTs, applies usage-time overrides and status detection
+# - The CLI's output modes (one/split/env) only format and write the normalized events
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+import requests
+from datetime import datetime, date, time, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import requests_cache
+except ImportError:  # optional: plain requests when not installed
+    requests_cache = None
+
+# --------- CONFIG ----------
+RENTMAN_ICAL_URL = (
+    "https://novolightingltd.sync.rentman.eu/ical.php?c=ap&i=33&t=hnAroMIDTw6eRlic8VZTa7tc1YVOgrCNTMC6tmD3gg4%3D%3A%3A%3Aef8c8108db57083c98a9fa98%3A%3A%3A"
+    "52a43e6f375c6e78589ede917e39542c"
+)
+TZID = "America/Vancouver"
+TZ = ZoneInfo(TZID)
+
+# --------- ICS PARSING ----------
+TEXT_PROPS = {"UID", "SUMMARY", "DESCRIPTION", "LOCATION", "STATUS"}
+# Every parsed event starts from these, so readers can index instead of .get()
+EVENT_DEFAULTS = {"uid": "", "summary": "Project", "description": "", "location": "", "status": ""}
+TEXT_ESCAPE = re.compile(r"\\([\\;,nN])")
+CATEGORY_SPLIT = re.compile(r"(?<!\\),")
+PARAM_SPLIT = re.compile(r';(?=(?:[^"]*"[^"]*")*[^"]*$)')  # ';' outside double quotes
+
+def unescape_text(value: str) -> str:
+    return TEXT_ESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+def unfold(lines):
+    """RFC 5545 unfolding over byte lines; joins bytes first so split UTF-8 sequences survive."""
+    cur = None
+    for line in lines:
+        if not line:  # blank lines carry nothing, and may come from a CRLF split across chunks
+            continue
+        if line[:1] in (b" ", b"\t") and cur is not None:
+            cur += line[1:]
+            continue
+        if cur is not None:
+            yield cur.decode("utf-8", "replace")
+        cur = line
+    if cur is not None:
+        yield cur.decode("utf-8", "replace")
+
+def ical_stamp(value: str, tzinfo=None) -> datetime:
+    """YYYYMMDDTHHMMSS by fixed-width slicing; odd shapes go through strptime."""
+    if len(value) != 15 or value[8] != "T":
+        return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tzinfo)
+    return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:]), tzinfo=tzinfo)
+
+# Outlook/Exchange feeds use Windows zone names as TZIDs (CLDR windowsZones, territory 001)
+WINDOWS_ZONES = {
+    "Pacific Standard Time": "America/Los_Angeles",
+    "Mountain Standard Time": "America/Denver",
+    "US Mountain Standard Time": "America/Phoenix",
+    "Central Standard Time": "America/Chicago",
+    "Canada Central Standard Time": "America/Regina",
+    "Central Standard Time (Mexico)": "America/Mexico_City",
+    "Eastern Standard Time": "America/New_York",
+    "Atlantic Standard Time": "America/Halifax",
+    "Newfoundland Standard Time": "America/St_Johns",
+    "Alaskan Standard Time": "America/Anchorage",
+    "Hawaiian Standard Time": "Pacific/Honolulu",
+    "SA Pacific Standard Time": "America/Bogota",
+    "E. South America Standard Time": "America/Sao_Paulo",
+    "UTC": "Etc/UTC",
+    "GMT Standard Time": "Europe/London",
+    "Greenwich Standard Time": "Atlantic/Reykjavik",
+    "W. Europe Standard Time": "Europe/Berlin",
+    "Romance Standard Time": "Europe/Paris",
+    "Central Europe Standard Time": "Europe/Budapest",
+    "Central European Standard Time": "Europe/Warsaw",
+    "E. Europe Standard Time": "Europe/Chisinau",
+    "FLE Standard Time": "Europe/Kiev",
+    "GTB Standard Time": "Europe/Bucharest",
+    "Turkey Standard Time": "Europe/Istanbul",
+    "Russian Standard Time": "Europe/Moscow",
+    "Israel Standard Time": "Asia/Jerusalem",
+    "South Africa Standard Time": "Africa/Johannesburg",
+    "Arabian Standard Time": "Asia/Dubai",
+    "India Standard Time": "Asia/Calcutta",
+    "Singapore Standard Time": "Asia/Singapore",
+    "China Standard Time": "Asia/Shanghai",
+    "Korea Standard Time": "Asia/Seoul",
+    "Tokyo Standard Time": "Asia/Tokyo",
+    "W. Australia Standard Time": "Australia/Perth",
+    "AUS Eastern Standard Time": "Australia/Sydney",
+    "New Zealand Standard Time": "Pacific/Auckland",
+}
+
+def resolve_tzid(tzid: str, location: str = ""):
+    """ZoneInfo for a TZID, or None (floating time) when nothing matches.
+
+    Tries the VTIMEZONE's X-LIC-LOCATION, a Windows zone name, the TZID itself,
+    then the tail of a vendor-prefixed ID such as /mozilla.org/20050126_1/Europe/Berlin.
+    """
+    tail = tzid.strip("/").split("/")
+    for key in (location, WINDOWS_ZONES.get(tzid), tzid, "/".join(tail[-3:]), "/".join(tail[-2:])):
+        if not key:
+            continue
+        try:
+            return ZoneInfo(key)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    return None
+
+def parse_ical_dt(value: str, params: dict, tzinfo=None):
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    if value.endswith("Z"):
+        return ical_stamp(value[:-1], timezone.utc)
+    return ical_stamp(value, tzinfo)
+
+def split_content_line(line: str):
+    """Return (NAME, {PARAM: value}, value), or None when the line has no value.
+
+    ':' and ';' inside double-quoted parameter values (e.g. ALTREP URIs) don't split.
+    """
+    head, sep, value = line.partition(":")
+    if not sep:
+        return None
+    if '"' in head:
+        quoted, cut = False, -1
+        for i, ch in enumerate(line):
+            if ch == '"':
+                quoted = not quoted
+            elif ch == ":" and not quoted:
+                cut = i
+                break
+        if cut < 0:
+            return None
+        head, value = line[:cut], line[cut + 1:]
+        parts = PARAM_SPLIT.split(head)
+    else:
+        parts = head.split(";")
+    params = {}
+    for p in parts[1:]:
+        k, _, v = p.partition("=")
+        params[k.upper()] = v.strip('"')
+    return parts[0].upper(), params, value
+
+def iter_vevents(lines):
+    """Yield one dict per VEVENT with the handful of properties the transform reads."""
+    comp = None
+    nested = 0
+    tz_block = None   # TZID/X-LIC-LOCATION of the VTIMEZONE being read
+    tz_locations = {}
+    zones = {}        # TZID -> ZoneInfo or None, resolved once per feed
+    for line in unfold(lines):
+        parsed = split_content_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+        if name == "BEGIN":
+            if comp is not None or tz_block is not None:
+                nested += 1
+            elif value.upper() == "VEVENT":
+                comp = dict(EVENT_DEFAULTS)
+            elif value.upper() == "VTIMEZONE":
+                tz_block = {}
+            continue
+        if name == "END":
+            if nested:
+                nested -= 1
+            elif comp is not None and value.upper() == "VEVENT":
+                yield comp
+                comp = None
+            elif tz_block is not None and value.upper() == "VTIMEZONE":
+                if "TZID" in tz_block:
+                    tz_locations[tz_block["TZID"]] = tz_block.get("X-LIC-LOCATION", "")
+                tz_block = None
+            continue
+        if nested:
+            continue
+        if tz_block is not None:
+            if name in ("TZID", "X-LIC-LOCATION"):
+                tz_block[name] = value
+            continue
+        if comp is None:
+            continue
+        if name in TEXT_PROPS:
+            comp[name.lower()] = unescape_text(value)
+        elif name in ("DTSTART", "DTEND"):
+            tzinfo = None
+            tzid = params.get("TZID")
+            if tzid:
+                try:
+                    tzinfo = zones[tzid]
+                except KeyError:
+                    tzinfo = zones[tzid] = resolve_tzid(tzid, tz_locations.get(tzid, ""))
+            comp[name.lower()] = parse_ical_dt(value, params, tzinfo)
+        elif name == "CATEGORIES":
+            comp.setdefault("categories", []).extend(
+                unescape_text(v) for v in CATEGORY_SPLIT.split(value)
+            )
+
+# --------- STATUS DETECTION ----------
+# Matched against lower-cased text, so no re.I
+STATUS_PAT = re.compile(
+    r"\b(?:(?P<cancel>cancel(?:l)?(?:ed)?|storniert|abgesagt)"
+    r"|(?P<confirm>confirm(?:ed)?|best(?:ae|ä)tigt)"
+    r"|(?P<option>option|concept|konzept|tentative|pending))\b"
+)
+STATUS_BY_GROUP = {
+    "cancel":  ("CANCELLED", "Cancelled"),
+    "confirm": ("CONFIRMED", "Confirmed"),
+    "option":  ("TENTATIVE", "Pending"),
+}
+
+DEFAULT_STATUS = ("TENTATIVE", "Pending")
+BATCH_SEP = "\x01"  # non-word, so \b still holds at each text's edges
+UNSCANNED = object()
+
+def _pick(found: set):
+    for group in ("cancel", "confirm", "option"):
+        if group in found:
+            return STATUS_BY_GROUP[group]
+    return None
+
+def scan_status(text: str):
+    """One pass over lower-cased text; cancel beats confirm beats option wherever they occur."""
+    found = set()
+    for m in STATUS_PAT.finditer(text):
+        if m.lastgroup == "cancel":
+            return STATUS_BY_GROUP["cancel"]
+        found.add(m.lastgroup)
+    return _pick(found)
+
+def scan_status_batch(texts):
+    """scan_status() for many texts with a single pass over one joined buffer."""
+    lowered = [t.lower() for t in texts]
+    starts, pos = [], 0
+    for t in lowered:
+        starts.append(pos)
+        pos += len(t) + len(BATCH_SEP)
+    found = [set() for _ in lowered]
+    for m in STATUS_PAT.finditer(BATCH_SEP.join(lowered)):
+        found[bisect_right(starts, m.start()) - 1].add(m.lastgroup)
+    return [_pick(f) for f in found]
+
+def status_from_component(comp, text_hit=UNSCANNED):
+    """Return ('CONFIRMED'|'TENTATIVE'|'CANCELLED', 'Confirmed'|'Pending'|'Cancelled').
+
+    text_hit may carry a precomputed scan of summary+description (see scan_status_batch).
+    """
+    sval = comp["status"].strip().upper()
+    if "CANCEL" in sval:  return ("CANCELLED", "Cancelled")
+    if "CONFIRM" in sval: return ("CONFIRMED", "Confirmed")
+    if "TENTATIVE" in sval: return ("TENTATIVE", "Pending")
+
+    try:
+        hit = _cats_status(" ".join(comp["categories"]))
+    except KeyError:  # most Rentman events carry no CATEGORIES
+        hit = None
+    if hit: return hit
+
+    if text_hit is UNSCANNED:
+        text_hit = scan_status((comp["summary"] + "\n" + comp["description"]).lower())
+    return text_hit or DEFAULT_STATUS
+
+@lru_cache(maxsize=256)
+def _cats_status(joined_cats: str):
+    # Rentman emits only a handful of distinct category strings
+    return scan_status(joined_cats.lower())
+
+# --------- USAGE DETECTION ----------
+# Matched against lower-cased text, so no re.I (date/time joiner may be "t")
+USAGE_LINE = re.compile(r"usage[^:\n]*[:\-]?\s*(.+)")
+# Optional trailing "z" or ±hh:mm offset goes to parse_dt's ISO path
+DT_PAIR = re.compile(
+    r"(\d{4}[-/]\d{1,2}[-/]\d{1,2}[ Tt]\d{1,2}:\d{2}(?::\d{2})?(?:[zZ]|[+-]\d{2}:\d{2})?)\s*(?:→|to|-|–)\s*"
+    r"(\d{4}[-/]\d{1,2}[-/]\d{1,2}[ Tt]\d{1,2}:\d{2}(?::\d{2})?(?:[zZ]|[+-]\d{2}:\d{2})?)"
+)
+TIME_PAIR = re.compile(
+    r"usage[^:\n]*[:\-]?\s*(\d{1,2}:\d{2})\s*(?:→|to|-|–)\s*(\d{1,2}:\d{2})"
+)
+DT_ALL = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})[ Tt](\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+def parse_dt(s: str):
+    s = s.strip()
+    m = DT_ALL.fullmatch(s)
+    if not m:
+        # ISO form with an offset or Z, e.g. 2025-07-01t08:00:00+02:00 (input is lower-cased)
+        try:
+            dtv = datetime.fromisoformat(s.upper().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return dtv if dtv.tzinfo else dtv.replace(tzinfo=TZ)
+    y, mo, d, h, mi, se = m.groups(default="0")
+    try:
+        return datetime(int(y), int(mo), int(d), int(h), int(mi), int(se), tzinfo=TZ)
+    except ValueError:  # out-of-range field, e.g. month 13
+        return None
+
+def hhmm(s: str) -> time:
+    h, _, m = s.partition(":")  # TIME_PAIR allows a 1-digit hour
+    return time(int(h), int(m))
+
+def usage_override(summary: str, desc: str, original_start, original_end):
+    lt = f"{summary}\n{desc}".lower()
+    if "usage" not in lt:
+        return None
+    lines = lt.splitlines()
+    for line in lines:
+        m = USAGE_LINE.search(line)
+        if not m: continue
+        tail = m.group(1)
+        p = DT_PAIR.search(tail)
+        if p:
+            s_dt = parse_dt(p.group(1)); e_dt = parse_dt(p.group(2))
+            if s_dt and e_dt: return s_dt, e_dt
+    for line in lines:
+        p = TIME_PAIR.search(line)
+        if p:
+            s_t = hhmm(p.group(1))
+            e_t = hhmm(p.group(2))
+            sd = original_start.date() if isinstance(original_start, datetime) else original_start
+            ed = original_end.date()   if isinstance(original_end, datetime) else original_end
+            return datetime.combine(sd, s_t, tzinfo=TZ), datetime.combine(ed, e_t, tzinfo=TZ)
+    return None
+
+@lru_cache(maxsize=1024)
+def local_midnight(d: date):
+    return datetime.combine(d, time(0, 0), tzinfo=TZ)
+
+# --------- ICS WRITING ----------
+ICAL_DT = "%Y%m%dT%H%M%S"
+TEXT_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": "\\n"})
+
+def escape_text(value: str) -> str:
+    return value.replace("\r\n", "\n").translate(TEXT_ESCAPES)
+
+def fold(line: str) -> bytes:
+    """UTF-8 encode with RFC 5545 folding at 75 octets, never splitting a sequence."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    parts, limit = [], 75
+    while raw:
+        cut = min(limit, len(raw))
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut])
+        raw, limit = raw[cut:], 74
+    return b"\r\n ".join(parts) + b"\r\n"
+
+def fold_block(block: str) -> bytes:
+    """Fold each LF-terminated line of a filled-in template into CRLF-terminated bytes."""
+    return b"".join(fold(line) for line in block.split("\n")[:-1])
+
+def ical_dt(dtv: datetime) -> str:
+    """Parameters + value for a DATE-TIME property, e.g. ';TZID=America/Vancouver:20250310T100000'."""
+    tz = dtv.tzinfo
+    if tz is None:
+        return f":{dtv.strftime(ICAL_DT)}"
+    if isinstance(tz, ZoneInfo) and tz.key != "UTC":
+        return f";TZID={tz.key}:{dtv.strftime(ICAL_DT)}"
+    # UTC or a bare offset: normalise to UTC
+    return f":{dtv.astimezone(timezone.utc).strftime(ICAL_DT)}Z"
+
+# --------- DOWNLOAD + NORMALIZE ----------
+CACHE_NAME = "rentman_http_cache"
+CACHE_TTL = 300  # seconds
+
+if requests_cache is not None:
+    SESSION = requests_cache.CachedSession(CACHE_NAME, backend="sqlite", expire_after=CACHE_TTL)
+else:
+    SESSION = requests.Session()
+SESSION.headers["Accept-Encoding"] = "gzip, deflate"
+
+def fetch_ics_lines(url: str = RENTMAN_ICAL_URL):
+    """Stream the feed line by line (bytes) over the shared keep-alive session."""
+    with SESSION.get(url, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        yield from resp.iter_lines()
+
+def normalize_event(comp: dict, text_hit=UNSCANNED) -> dict:
+    """Apply all-day widening, usage override and status detection to one parsed VEVENT."""
+    # iter_vevents fills EVENT_DEFAULTS and yields plain str values; read each once
+    summary = comp["summary"]
+    desc    = comp["description"]
+
+    dtstart = comp["dtstart"]
+    dtend   = comp["dtend"]
+    if isinstance(dtstart, date) and not isinstance(dtstart, datetime):
+        dtstart = local_midnight(dtstart)
+    if isinstance(dtend, date) and not isinstance(dtend, datetime):
+        dtend = local_midnight(dtend)
+
+    u = usage_override(summary, desc, dtstart, dtend)
+    if u:
+        dtstart, dtend = u
+
+    ical_status, label = status_from_component(comp, text_hit)
+    return {
+        "uid": comp["uid"],
+        "summary": summary,
+        "description": desc,
+        "location": comp["location"],
+        "dtstart": dtstart,
+        "dtend": dtend,
+        "status": ical_status,
+        "label": label,
+        "usage_override": bool(u),
+    }
+
+def download_and_parse(url: str = RENTMAN_ICAL_URL):
+    """Return a list of normalized event dicts, shared by every CLI output mode."""
+    comps = list(iter_vevents(fetch_ics_lines(url)))
+    text_hits = scan_status_batch([c["summary"] + "\n" + c["description"] for c in comps])
+    return [normalize_event(c, hit) for c, hit in zip(comps, text_hits)]
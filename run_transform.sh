@@ -1,5 +1,5 @@
 #!/usr/bin/env bash
 cd ~/Documents/rentman-ical
 export RENTMAN_ICAL_URL='https://novolightingltd.sync.rentman.eu/ical.php?c=ap&i=33&t=hnAroMIDTw6eRlic8VZTa7tc1YVOgrCNTMC6tmD3gg4%3D%3A%3A%3Aef8c8108db57083c98a9fa98%3A%3A%3A52a43e6f375c6e78589ede917e39542c'
-/usr/bin/env python3 transform_rentman_ical.py
+/usr/bin/env python3 transform_rentman_ical.py env
 
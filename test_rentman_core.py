@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from rentman_core import iter_vevents, scan_status, scan_status_batch, usage_override
+
+def parse(*props):
+    lines = ["BEGIN:VCALENDAR", "BEGIN:VEVENT", "UID:x", *props, "END:VEVENT", "END:VCALENDAR"]
+    return list(iter_vevents(l.encode("utf-8") for l in lines))[0]
+
+def test_quoted_parameter_values_do_not_split():
+    comp = parse(
+        'DESCRIPTION;ALTREP="cid:part1@example.org":Real text',
+        'LOCATION;ALTREP="http://x.org/a;b":Hall',
+        'DTSTART;X-NOTE="a:b;c";TZID="America/Vancouver":20250310T100000',
+    )
+    assert comp["description"] == "Real text"
+    assert comp["location"] == "Hall"
+    assert comp["dtstart"] == datetime(2025, 3, 10, 10, tzinfo=ZoneInfo("America/Vancouver"))
+
+def test_windows_tzid_maps_to_iana():
+    comp = parse("DTSTART;TZID=W. Europe Standard Time:20250310T100000")
+    assert comp["dtstart"].tzinfo == ZoneInfo("Europe/Berlin")
+
+def test_unknown_tzid_falls_back_to_floating():
+    comp = parse("DTSTART;TZID=Custom/Zone:20250310T100000")
+    assert comp["dtstart"] == datetime(2025, 3, 10, 10)
+
+def test_tzid_resolved_from_vtimezone():
+    lines = [
+        "BEGIN:VCALENDAR",
+        "BEGIN:VTIMEZONE", "TZID:Office", "X-LIC-LOCATION:Europe/Paris",
+        "BEGIN:STANDARD", "TZOFFSETFROM:+0200", "TZOFFSETTO:+0100", "END:STANDARD",
+        "END:VTIMEZONE",
+        "BEGIN:VEVENT", "UID:x", "DTSTART;TZID=Office:20250310T100000", "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    comp = list(iter_vevents(l.encode("utf-8") for l in lines))[0]
+    assert comp["dtstart"].tzinfo == ZoneInfo("Europe/Paris")
+
+def test_usage_override_with_iso_offsets():
+    start, end = usage_override(
+        "Show", "Usage: 2025-07-01T08:00:00+02:00 - 2025-07-01T10:00:00Z", None, None
+    )
+    assert start == datetime(2025, 7, 1, 6, tzinfo=timezone.utc)
+    assert end == datetime(2025, 7, 1, 10, tzinfo=timezone.utc)
+
+def test_non_ascii_compound_is_not_a_keyword():
+    texts = ["konzeptänderung besprochen", "stornierté", "abgesagtä", "éconfirmed"]
+    assert [scan_status(t) for t in texts] == [None, None, None, None]
+    assert scan_status_batch(texts) == [None, None, None, None]
+
+def test_batch_scan_matches_per_text_scan():
+    texts = [
+        "Cancelled\nshow",           # keyword at the very start
+        "Show\n",                    # empty description
+        "",
+        "Tour\nnow pending",         # keyword at the very end
+        "Übergabe – İstanbul\nconfirmed",  # non-ASCII (İ lowers to two chars) before a keyword
+        "option\nbut Storniert",     # cancel beats option across the two fields
+        "konzeptänderung\nbesprochen",
+        "x\x01confirmed",            # the separator inside a text
+    ]
+    assert scan_status_batch(texts) == [scan_status(t.lower()) for t in texts]